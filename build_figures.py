@@ -0,0 +1,201 @@
+"""
+Headless, parallel and incremental build of the figures of the plotting scripts.
+
+A plotting script registers its figures in a module-level list
+
+    FIGURES = [
+        {'output': 'mexican_hat.svg', 'data': compute, 'params': {'radius': 1.3, 'n': 400}, 'render': render},
+    ]
+
+where data(**params) returns a dict of arrays and render(data, output) draws and saves
+the figure to `output`, relative to the script. Scripts are found by searching for
+`FIGURES =` in the source, without importing them.
+
+Every figure has a key, the hash of its parameters and of the source of the script and of
+the sibling modules it imports. The data are cached as .npz under that key, and a figure
+is rebuilt only if its key changed or its output is missing. Stale scripts are imported
+and rendered in a process pool on the Agg backend, one fresh process per script.
+
+    python build_figures.py                   # rebuild stale figures on all cores
+    python build_figures.py phys_projects -j 2
+    python build_figures.py --force           # ignore all caches
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ROOT, '.figure_cache')
+MANIFEST = os.path.join(CACHE_DIR, 'manifest.json')
+
+_REGISTRY = re.compile(r'^FIGURES\s*=', re.MULTILINE)
+_IMPORT = re.compile(r'^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))', re.MULTILINE)
+
+
+def find_scripts(paths):
+    """
+    All scripts under `paths` that register figures.
+    """
+    scripts = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            candidates = [path]
+        else:
+            candidates = [os.path.join(d, f) for d, dirs, files in os.walk(path)
+                          if '.ipynb_checkpoints' not in d and CACHE_DIR not in d
+                          for f in files if f.endswith('.py')]
+        for candidate in candidates:
+            with open(candidate, encoding='utf-8') as f:
+                if candidate != os.path.abspath(__file__) and _REGISTRY.search(f.read()):
+                    scripts.append(candidate)
+    return sorted(set(scripts))
+
+
+def source_hash(script):
+    """
+    Hash of the script and, transitively, of the modules next to it that it imports.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(script)
+    todo, seen = [script], set()
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest.update(os.path.basename(path).encode() + b'\0' + source)
+        for names in _IMPORT.findall(source.decode('utf-8')):
+            sibling = os.path.join(directory, (names[0] or names[1]) + '.py')
+            if os.path.isfile(sibling):
+                todo.append(sibling)
+    return digest.hexdigest()
+
+
+def figure_key(source, figure):
+    """
+    Cache key of a figure: hash of the script sources, its output and its parameters.
+    """
+    params = json.dumps(figure.get('params', {}), sort_keys=True, default=repr)
+    return hashlib.sha256(f"{source}\0{figure['output']}\0{params}".encode()).hexdigest()
+
+
+def load_manifest():
+    if os.path.exists(MANIFEST):
+        with open(MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def is_stale(script, manifest):
+    """
+    Whether any figure of the script has to be rebuilt, decided without importing it.
+    """
+    entry = manifest.get(os.path.relpath(script, ROOT))
+    if entry is None or entry['source'] != source_hash(script):
+        return True
+    directory = os.path.dirname(script)
+    return any(not os.path.exists(os.path.join(directory, output)) for output in entry['outputs'])
+
+
+def build_script(script, force=False):
+    """
+    Import a script on the Agg backend and build its figures; runs in a worker process.
+
+    :return: the manifest entry of the script and the names of the figures rendered
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    directory = os.path.dirname(script)
+    sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location('_figure_script', script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    source = source_hash(script)
+    outputs = [figure['output'] for figure in module.FIGURES]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError(f"{script} registers the same output twice.")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    rendered = []
+    for figure in module.FIGURES:
+        key = figure_key(source, figure)
+        cache = os.path.join(CACHE_DIR, key + '.npz')
+        if os.path.exists(cache) and not force:
+            with np.load(cache) as npz:
+                data = dict(npz)
+        else:
+            data = figure['data'](**figure.get('params', {}))
+            np.savez(cache, **data)
+        figure['render'](data, os.path.join(directory, figure['output']))
+        plt.close('all')
+        rendered.append(figure['output'])
+    return {'source': source, 'outputs': outputs}, rendered
+
+
+def build(paths, jobs=None, force=False):
+    """
+    Rebuild the stale figures of all scripts under `paths` in parallel.
+
+    :return: number of scripts that failed
+    """
+    manifest = load_manifest()
+    scripts = find_scripts(paths)
+    stale = [s for s in scripts if force or is_stale(s, manifest)]
+    print(f"{len(stale)} of {len(scripts)} scripts are stale")
+    if not stale:
+        return 0
+
+    failed = 0
+    start = time.perf_counter()
+    # a fresh process per script keeps same-named modules of different folders apart
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, max_tasks_per_child=1) as pool:
+        futures = {pool.submit(build_script, script, force): script for script in stale}
+        for future in as_completed(futures):
+            script = os.path.relpath(futures[future], ROOT)
+            try:
+                entry, rendered = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"FAILED {script}: {type(e).__name__}: {e}")
+                continue
+            manifest[script] = entry
+            save_manifest(manifest)
+            print(f"built {script}: {', '.join(rendered)}")
+    print(f"done in {time.perf_counter() - start:.1f} s, {failed} failed")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the figures of the plotting scripts.")
+    parser.add_argument('paths', nargs='*', default=[ROOT], help="scripts or folders to search")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--force', action='store_true', help="ignore the data cache and rebuild everything")
+    args = parser.parse_args()
+    sys.exit(1 if build(args.paths, args.jobs, args.force) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Recognition of rational numbers p/q in arrays of floats by continued fractions.
+
+All elements are expanded simultaneously, x = a0 + 1/(a1 + 1/(a2 + ...)), with the
+convergents h_n/k_n following h_n = a_n h_{n-1} + h_{n-2} (likewise k_n). An element
+stops as soon as its convergent matches x within the tolerance, or when the next
+denominator would exceed max_denominator; in the latter case the best semiconvergent
+below the limit is taken, as Fraction.limit_denominator() does. The choice between it and
+the last convergent is made exactly, and the results agree with limit_denominator() as
+long as |x| * max_denominator^2 < 2^52. Beyond that, approximations differ from x by less
+than its float64 resolution and the expansion, done in floating point, no longer follows
+the exact binary value of x that limit_denominator() expands.
+"""
+
+import numpy as np
+
+# Continued fractions of float64 numbers terminate well within this many terms
+CF_MAXITER = 64
+
+# Partial quotients are clipped to this value before the cast to int64; as |x| and
+# max_denominator are limited to 2^31, any larger quotient exceeds max_denominator too
+CF_MAX_QUOTIENT = 2.0 ** 31
+
+# A match p/q within the bound b is only trusted if q^2 * b is below this margin: any x has
+# approximations with error ~ 1/q^2, so larger denominators match irrational numbers too.
+# Confident denominators are thus limited to about sqrt(CONFIDENCE_MARGIN / tol).
+CONFIDENCE_MARGIN = 1e-2
+
+
+def _two_product(a, b):
+    """
+    Error-free product of float64 arrays (Dekker): a * b = p + e exactly, p = fl(a * b).
+    """
+    p = a * b
+    a_hi, a_lo = _split(a)
+    b_hi, b_lo = _split(b)
+    e = ((a_hi * b_hi - p) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+    return p, e
+
+
+def _split(a):
+    """
+    Split float64 numbers into two halves of 26 significant bits, a = hi + lo.
+    """
+    t = 134217729.0 * a  # 2^27 + 1
+    hi = t - (t - a)
+    return hi, a - hi
+
+
+def rationalize(x, max_denominator=10 ** 6, tol=1e-12):
+    """
+    Best rational approximations p/q of the elements of x with q <= max_denominator.
+
+    :param x: array-like of floats
+    :param max_denominator: largest denominator allowed, at most 2^31
+    :param tol: an approximation is accepted when |x - p/q| <= tol * max(1, |x|)
+    :return: num, den, confident; int64 arrays of the shape of x and a boolean array that
+        is True where p/q matches x within tol with a small enough denominator to rule out
+        an accidental match, see CONFIDENCE_MARGIN (den=0 for non-finite x); numpy scalars
+        for scalar x. Note that confident limits the denominators to about
+        sqrt(CONFIDENCE_MARGIN / tol), 10^5 for the default tol, whatever max_denominator;
+        exact floats p/q with larger q need a smaller tol.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if not 1 <= max_denominator <= 2 ** 31:
+        raise ValueError("max_denominator must lie in [1, 2^31].")
+    if np.any(np.abs(x[np.isfinite(x)]) >= 2.0 ** 31):
+        raise ValueError("Values beyond 2^31 cannot be represented as int64 fractions.")
+
+    sign = np.where(x < 0, -1, 1)
+    finite = np.isfinite(x)
+    value = np.where(finite, np.abs(x), 0.0).ravel()
+    bound = tol * np.maximum(1.0, value)
+
+    # convergents h/k, with (h1, k1) the current and (h2, k2) the previous one
+    h2, h1 = np.zeros_like(value, dtype=np.int64), np.ones_like(value, dtype=np.int64)
+    k2, k1 = np.ones_like(h1), np.zeros_like(h1)
+    num, den = np.zeros_like(h1), np.ones_like(h1)
+
+    active = np.arange(value.size)
+    r = value.copy()
+    for _ in range(CF_MAXITER):
+        if active.size == 0:
+            break
+        a = np.floor(np.minimum(r[active], CF_MAX_QUOTIENT))
+        ai = a.astype(np.int64)
+        h_new = ai * h1[active] + h2[active]
+        k_new = ai * k1[active] + k2[active]
+
+        # the next denominator is too large: take the best semiconvergent below the limit
+        over = k_new > max_denominator
+        if np.any(over):
+            idx = active[over]
+            t = (max_denominator - k2[idx]) // k1[idx]
+            h_semi, k_semi = t * h1[idx] + h2[idx], t * k1[idx] + k2[idx]
+            # the candidates lie on either side of x, 1/(k1 k_semi) apart, so h1/k1 is at
+            # least as close iff 2 k_semi |k1 x - h1| <= 1; k1 x is formed exactly, and
+            # k1 x - fl(k1 x) is exact too as the difference is small (Sterbenz)
+            p, e = _two_product(k1[idx].astype(np.float64), value[idx])
+            semi_better = 2 * k_semi * np.abs((p - h1[idx]) + e) > 1
+            num[idx] = np.where(semi_better, h_semi, h1[idx])
+            den[idx] = np.where(semi_better, k_semi, k1[idx])
+
+        keep = ~over
+        idx, a, h_new, k_new = active[keep], a[keep], h_new[keep], k_new[keep]
+        h2[idx], h1[idx] = h1[idx], h_new
+        k2[idx], k1[idx] = k1[idx], k_new
+
+        # accept the convergent once it matches, or when the expansion terminates
+        frac = r[idx] - a
+        done = (np.abs(value[idx] - h_new / k_new) <= bound[idx]) | (frac == 0)
+        num[idx[done]], den[idx[done]] = h_new[done], k_new[done]
+
+        active = idx[~done]
+        with np.errstate(divide='ignore', over='ignore'):
+            r[active] = 1 / frac[~done]
+    else:
+        num[active], den[active] = h1[active], k1[active]
+
+    num = num.reshape(x.shape) * sign
+    den = den.reshape(x.shape)
+    den[~finite] = 0
+    bound = bound.reshape(x.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        match = np.abs(x - num / den) <= bound
+    confident = finite & match & (den.astype(float) ** 2 * bound < CONFIDENCE_MARGIN)
+    if x.ndim == 0:
+        return num[()], den[()], confident[()]
+    return num, den, confident
+
+
+def test_rationalize():
+    from fractions import Fraction
+
+    rng = np.random.default_rng(1)
+    p, q = rng.integers(-10 ** 4, 10 ** 4, 10 ** 5), rng.integers(1, 10 ** 4, 10 ** 5)
+    num, den, confident = rationalize(p / q)
+    g = np.gcd(p, q)
+    assert confident.all() and (num == p // g).all() and (den == q // g).all()
+
+    # integers and zero are rational too
+    num, den, confident = rationalize([0.0, 3.0, -7.0, 3.5])
+    assert (num == [0, 3, -7, 7]).all() and (den == [1, 1, 1, 2]).all() and confident.all()
+
+    # irrational numbers give the same best approximation as Fraction.limit_denominator()
+    x = np.array([np.pi, np.e, np.sqrt(2), -np.pi])
+    for max_den in [7, 100, 1000, 10 ** 6]:
+        num, den, confident = rationalize(x, max_den, tol=0)
+        expected = [Fraction(float(v)).limit_denominator(max_den) for v in x]
+        assert [Fraction(int(n), int(d)) for n, d in zip(num, den)] == expected
+        assert not confident.any()
+    # also where the two candidates are closer than the float resolution of x
+    x = rng.uniform(100, 1000, 5000)
+    num, den, _ = rationalize(x, 10 ** 6, tol=0)
+    assert [Fraction(int(n), int(d)) for n, d in zip(num, den)] == \
+        [Fraction(float(v)).limit_denominator(10 ** 6) for v in x]
+    assert rationalize(780.5862240301133, tol=0)[:2] == (614259692, 786921)
+    x = np.array([np.pi, np.e, np.sqrt(2), -np.pi])
+    # with the default tolerance, close approximations of irrational numbers are not trusted
+    assert not rationalize(x)[2].any()
+
+    num, den, confident = rationalize([np.nan, np.inf])
+    assert (den == 0).all() and not confident.any()
+
+    # tiny values have huge partial quotients, down to the smallest subnormal
+    num, den, confident = rationalize([1e-20, 1e-300, 5e-324, -1e-20], tol=0)
+    assert (num == 0).all() and (den == 1).all() and not confident.any()
+    num, den, confident = rationalize([1e-20, 3e-7], max_denominator=10 ** 6)
+    assert (num == [0, 0]).all() and (den == [1, 1]).all() and confident[0] and not confident[1]
+
+    # scalars give scalars of the same kind
+    num, den, confident = rationalize(0.75)
+    assert isinstance(num, np.int64) and isinstance(den, np.int64) and isinstance(confident, np.bool_)
+    assert (num, den, confident) == (3, 4, True)
+
+    # denominators beyond sqrt(CONFIDENCE_MARGIN / tol) are only trusted with a smaller tol
+    assert rationalize(1 / 123457)[1] == 123457 and not rationalize(1 / 123457)[2]
+    assert rationalize(1 / 123457, tol=1e-14)[2]
+
+
+def test_bernoulli_numbers():
+    # float Bernoulli numbers from the recursion in main.py turn back into exact fractions
+    from fractions import Fraction
+    from math import comb
+    from main import reduction_list
+
+    exact = [Fraction(1)]
+    for n in range(1, 21):
+        exact.append(-sum(comb(n + 1, k) * exact[k] for k in range(n)) / (n + 1))
+    num, den, confident = rationalize(reduction_list(20))
+    assert confident.all()
+    assert [Fraction(int(n), int(d)) for n, d in zip(num, den)] == exact
+
+
+if __name__ == '__main__':
+    test_rationalize()
+    test_bernoulli_numbers()
@@ -1,11 +1,25 @@
-from fractions import Fraction
+from rational import CONFIDENCE_MARGIN, rationalize
 
 
-def is_rational(num):
-    fraction = Fraction(num).limit_denominator()
-    return fraction.denominator != 1  # 如果分母为1，则表示是整数（有理数）
+def is_rational(num, max_denominator=1000000):
+    # 连分数展开，分母不超过 max_denominator 时能精确表示（包括整数）即为有理数
+    # 容差随 max_denominator 取 CONFIDENCE_MARGIN / max_denominator^2，使所有允许的分母都可信，
+    # 但不小于浮点精度，因此 max_denominator 超过约 3e6 时可信的分母仍受限于 sqrt(CONFIDENCE_MARGIN / 1e-15)
+    tol = max(CONFIDENCE_MARGIN / max_denominator ** 2, 1e-15)
+    _, _, confident = rationalize(num, max_denominator, tol)
+    return bool(confident)
 
 
-# 示例
-num = 3.5
-print(f"{num} 是有理数吗？{is_rational(num)}")
+def test_is_rational():
+    import numpy as np
+    assert is_rational(3.5) and is_rational(-7.0) and is_rational(1 / 123457) and is_rational(999983 / 999979)
+    assert not any(is_rational(x) for x in [np.pi, np.e, np.sqrt(2)])
+    assert not is_rational(1 / 123457, max_denominator=1000)
+
+
+if __name__ == '__main__':
+    test_is_rational()
+
+    # 示例
+    num = 3.5
+    print(f"{num} 是有理数吗？{is_rational(num)}")
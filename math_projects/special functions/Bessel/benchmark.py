@@ -0,0 +1,56 @@
+"""
+Speed and accuracy of BesselTable against scipy on 10^7 arguments.
+"""
+
+import time
+
+import numpy as np
+
+from bessel import BesselTable, log_i0, log_k0
+
+N = 10 ** 7
+REPEAT = 3
+
+
+def best_time(func, x):
+    """
+    Best wall time of REPEAT calls, and the result.
+    """
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        y = func(x)
+        times.append(time.perf_counter() - start)
+    return min(times), y
+
+
+def benchmark_tables(lo=0.5, hi=700.0):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(lo, hi, N)
+    print(f"{N:.0e} arguments uniform in [{lo}, {hi}]")
+    print(f"{'function':>10} {'pieces':>8} {'build/s':>8} {'scipy/s':>8} {'table/s':>8} {'speedup':>8} {'max rel err':>12}")
+    for name in ['i0', 'i1', 'k0', 'k1']:
+        start = time.perf_counter()
+        table = BesselTable(name, lo, hi)
+        build = time.perf_counter() - start
+        t_scipy, exact = best_time(table.func, x)
+        t_table, approx = best_time(table, x)
+        err = np.max(np.abs(approx - exact) / np.abs(exact))
+        print(f"{name + 'e':>10} {table.n:>8} {build:>8.3f} {t_scipy:>8.3f} {t_table:>8.3f} "
+              f"{t_scipy / t_table:>8.2f} {err:>12.2e}")
+
+
+def benchmark_overflow():
+    x = np.array([10.0, 700.0, 710.0, 1e4, 1e6])
+    from scipy.special import i0, k0
+    with np.errstate(over='ignore', divide='ignore'):
+        print("x         ", x)
+        print("log(i0(x))", np.log(i0(x)))
+        print("log_i0(x) ", log_i0(x))
+        print("log(k0(x))", np.log(k0(x)))
+        print("log_k0(x) ", log_k0(x))
+
+
+if __name__ == '__main__':
+    benchmark_tables()
+    benchmark_overflow()
@@ -2,16 +2,32 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.special import i0
 
-# Define the range of 'a' values for plotting I0(a)
-a_values = np.linspace(0, 10, 500)
-I0_values = i0(a_values)
-
-# Plotting the I0(a) function
-plt.figure(figsize=(8, 6))
-plt.plot(a_values, I0_values, label=r'$I_0(a)$', color='blue')
-plt.title(r'Plot of the Modified Bessel Function of the First Kind, $I_0(a)$')
-plt.xlabel(r'$a$')
-plt.ylabel(r'$I_0(a)$')
-plt.legend()
-plt.grid(True)
-plt.show()
+
+def compute(a_max, n):
+    # Define the range of 'a' values for plotting I0(a)
+    a_values = np.linspace(0, a_max, n)
+    return {'a': a_values, 'I0': i0(a_values)}
+
+
+def render(data, output):
+    # Plotting the I0(a) function
+    plt.figure(figsize=(8, 6))
+    plt.plot(data['a'], data['I0'], label=r'$I_0(a)$', color='blue')
+    plt.title(r'Plot of the Modified Bessel Function of the First Kind, $I_0(a)$')
+    plt.xlabel(r'$a$')
+    plt.ylabel(r'$I_0(a)$')
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(output)
+
+
+# Figures built by build_figures.py
+FIGURES = [
+    {'output': 'i0.png', 'data': compute, 'params': {'a_max': 10, 'n': 500}, 'render': render},
+]
+
+
+if __name__ == '__main__':
+    for figure in FIGURES:
+        figure['render'](figure['data'](**figure['params']), figure['output'])
+    plt.show()
@@ -0,0 +1,39 @@
+"""
+Call overhead of cached index contractions against einsum on small tensors.
+"""
+
+from timeit import repeat
+
+import numpy as np
+
+from indices import compile_expression
+
+NUMBER = 2000
+REPEAT = 5
+
+
+def best_time(func):
+    """
+    Best time of a single call, in microseconds.
+    """
+    return min(repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def benchmark_contractions():
+    rng = np.random.default_rng(0)
+    cases = [
+        ('g^{ab} Γ_{bcd}', [rng.normal(size=(4, 4)), rng.normal(size=(4, 4, 4))]),
+        ('R^a_{bac}', [rng.normal(size=(4, 4, 4, 4))]),
+        ('A^i_j B^j_k C^k_l', [rng.normal(size=(50, 2)), rng.normal(size=(2, 50)), rng.normal(size=(50, 3))]),
+    ]
+    print(f"{'expression':>20} {'cached/us':>10} {'einsum/us':>10} {'optimal/us':>11}")
+    for expr, operands in cases:
+        c = compile_expression(expr)
+        cached = best_time(lambda: c(*operands))
+        plain = best_time(lambda: np.einsum(c.subscripts, *operands))
+        searched = best_time(lambda: np.einsum(c.subscripts, *operands, optimize='optimal'))
+        print(f"{expr:>20} {cached:>10.1f} {plain:>10.1f} {searched:>11.1f}")
+
+
+if __name__ == '__main__':
+    benchmark_contractions()
@@ -0,0 +1,297 @@
+"""
+Tensor contractions written in index notation, e.g.
+
+    contract('R^a_{bac}', riemann)              # Ricci tensor R_{bc}
+    contract('g^{ab} Γ_{bcd}', g_up, gamma)     # Γ^a_{cd}
+    contract('g^{ab} R_{ab}', g_up, ricci)      # Ricci scalar
+
+Repeated indices are summed (Einstein convention), the free indices form the result in
+the order of their first appearance, unless the output is given explicitly after '->',
+e.g. 'Γ^a_{bc} -> _{cb}^a'. Each index is a single character and a tensor name one or
+more letters or digits; several indices go in braces.
+
+An expression is parsed once and turned into an einsum subscript string. The optimal
+contraction order is searched once per expression and operand shapes and cached together
+with the subscripts of its pairwise steps, which are then run directly by einsum or, for
+plain products, tensordot. Repeated contractions in time-stepping or curvature loops thus
+skip both the path search and its validation inside einsum, see benchmark_indices.py.
+Numeric and object (e.g. sympy) arrays are supported alike.
+"""
+
+import re
+from functools import lru_cache
+from itertools import groupby
+
+import numpy as np
+
+# Expressions with more operands fall back from the exhaustive to the greedy path search
+OPTIMAL_PATH_MAX_OPERANDS = 4
+
+_FACTOR = re.compile(r'\s*\*?\s*([^\W_]+)((?:\s*[\^_]\s*(?:\{[^}]*\}|[^\W_]))*)')
+_INDICES = re.compile(r'([\^_])\s*(?:\{([^}]*)\}|([^\W_]))')
+
+# Pairwise steps with at least this many multiply-adds run on tensordot (BLAS), smaller
+# ones on einsum, which has less call overhead
+TENSORDOT_MIN_SIZE = 2 ** 14
+
+# contraction paths and their steps, keyed on (subscripts, operand shapes)
+_PLANS = {}
+
+
+def _parse_indices(text):
+    """
+    Split '^a_{bc}' into the index characters and their positions ('^' upper, '_' lower).
+    """
+    indices, variance = [], []
+    for pos, group, single in _INDICES.findall(text):
+        chars = (group if group else single).replace(' ', '')
+        indices += chars
+        variance += pos * len(chars)
+    return ''.join(indices), ''.join(variance)
+
+
+def _format_indices(indices, variance):
+    """
+    Inverse of _parse_indices: 'acd', '^__' -> '^a_{cd}'.
+    """
+    text = ''
+    for pos, group in groupby(zip(variance, indices), key=lambda iv: iv[0]):
+        chars = ''.join(i for _, i in group)
+        text += pos + (chars if len(chars) == 1 else f'{{{chars}}}')
+    return text
+
+
+class Contraction:
+    """
+    A parsed index expression, callable on the operands.
+
+    :ivar names: tensor names of the factors
+    :ivar subscripts: equivalent einsum subscripts
+    :ivar output: free indices of the result with their positions, e.g. '_{bc}'
+    """
+
+    def __init__(self, expr, strict=True):
+        self.expr = expr
+        lhs, _, rhs = expr.partition('->')
+        self.names, factors = [], []
+        pos = 0
+        lhs = lhs.rstrip()
+        while pos < len(lhs):
+            match = _FACTOR.match(lhs, pos)
+            if match is None or match.end() == pos:
+                raise ValueError(f"Cannot parse index expression '{expr}' at position {pos}.")
+            self.names.append(match.group(1))
+            factors.append(_parse_indices(match.group(2)))
+            pos = match.end()
+        if not factors:
+            raise ValueError(f"Empty index expression '{expr}'.")
+
+        # count occurrences and check the summation convention
+        seen = {}
+        for indices, variance in factors:
+            for i, v in zip(indices, variance):
+                seen.setdefault(i, []).append(v)
+        for i, vs in seen.items():
+            if len(vs) > 2:
+                raise ValueError(f"Index '{i}' appears {len(vs)} times in '{expr}'.")
+            if strict and len(vs) == 2 and vs[0] == vs[1]:
+                raise ValueError(f"Summed index '{i}' must appear once up and once down in '{expr}'.")
+
+        if rhs.strip():
+            out, out_var = _parse_indices(rhs) if re.search(r'[\^_]', rhs) else (rhs.strip(), '')
+            free = [i for i, vs in seen.items() if len(vs) == 1]
+            if sorted(out) != sorted(free):
+                raise ValueError(f"Output indices '{out}' do not match the free indices '{''.join(free)}'.")
+            if out_var and strict and any(seen[i][0] != v for i, v in zip(out, out_var)):
+                raise ValueError(f"Output index positions '{rhs.strip()}' do not match '{expr}'.")
+        else:
+            out = ''.join(i for i, vs in seen.items() if len(vs) == 1)
+        variance = {i: vs[0] for i, vs in seen.items()}
+
+        # einsum only knows ASCII letters
+        letters = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        if len(seen) > len(letters):
+            raise ValueError(f"Too many distinct indices in '{expr}'.")
+        symbol = dict(zip(seen, letters))
+        self.subscripts = ','.join(''.join(symbol[i] for i in indices) for indices, _ in factors) \
+            + '->' + ''.join(symbol[i] for i in out)
+        self.output = _format_indices(out, [variance[i] for i in out])
+
+    def __repr__(self):
+        return f"Contraction('{self.expr}' -> '{self.subscripts}')"
+
+    def path(self, *operands):
+        """
+        The cached contraction order for operands of these shapes.
+        """
+        return self._plan(tuple(np.shape(op) for op in operands))[0]
+
+    def _plan(self, shapes):
+        """
+        Search the contraction path once per operand shapes and split it into steps
+        (positions, subscripts, axes, perm); a step contracts the operands at `positions`
+        and appends the result, with tensordot over `axes` followed by a transpose `perm`
+        if axes is not None, else with einsum; a single step is just the whole expression.
+        """
+        key = (self.subscripts, shapes)
+        if key not in _PLANS:
+            method = 'optimal' if len(shapes) <= OPTIMAL_PATH_MAX_OPERANDS else 'greedy'
+            # the path search only needs the shapes: zero-stride dummies, no copies of the
+            # operands, nor object arrays touched
+            dummies = [np.broadcast_to(np.empty(()), shape) for shape in shapes]
+            path = np.einsum_path(self.subscripts, *dummies, optimize=method)[0]
+
+            inputs, output = self.subscripts.split('->')
+            terms, steps = inputs.split(','), []
+            size = {i: n for term, shape in zip(terms, shapes) for i, n in zip(term, shape)}
+            for positions in path[1:]:
+                taken = [terms[i] for i in positions]
+                for i in sorted(positions, reverse=True):
+                    del terms[i]
+                if terms:
+                    rest = ''.join(terms) + output
+                    result = ''.join(dict.fromkeys(i for i in ''.join(taken) if i in rest))
+                else:
+                    result = output
+                terms.append(result)
+                work = np.prod([size[i] for i in set(''.join(taken))])
+                axes = _tensordot_axes(taken, result) if work >= TENSORDOT_MIN_SIZE else (None, None)
+                steps.append((positions, ','.join(taken) + '->' + result) + axes)
+            _PLANS[key] = path, steps
+        return _PLANS[key]
+
+    def __call__(self, *operands):
+        if len(operands) != len(self.names):
+            raise ValueError(f"'{self.expr}' needs {len(self.names)} operands, got {len(operands)}.")
+        operands = [np.asarray(op) for op in operands]
+        steps = self._plan(tuple([op.shape for op in operands]))[1]
+        if len(steps) == 1 and steps[0][2] is None:
+            return np.einsum(self.subscripts, *operands, optimize=False)
+        for positions, subscripts, axes, perm in steps:
+            taken = [operands[i] for i in positions]
+            for i in sorted(positions, reverse=True):
+                del operands[i]
+            if axes is None:
+                operands.append(np.einsum(subscripts, *taken, optimize=False))
+            else:
+                operands.append(np.tensordot(*taken, axes=axes).transpose(perm))
+        return operands[0]
+
+
+def _tensordot_axes(terms, result):
+    """
+    Axes and output permutation of tensordot for a product of two tensors that sums over
+    all shared indices, or (None, None) if the step needs einsum (traces, batch indices).
+    """
+    if len(terms) != 2:
+        return None, None
+    a, b = terms
+    shared = [i for i in a if i in b]
+    if len(set(a)) < len(a) or len(set(b)) < len(b) or any(i in result for i in shared) \
+            or any(i not in result for i in a + b if i not in shared):
+        return None, None
+    natural = [i for i in a + b if i not in shared]
+    return ([a.index(i) for i in shared], [b.index(i) for i in shared]), [natural.index(i) for i in result]
+
+
+@lru_cache(maxsize=None)
+def compile_expression(expr, strict=True):
+    """
+    Parse an index expression once; the result is cached on the expression string.
+
+    :param expr: index expression, e.g. 'g^{ab} Γ_{bcd}'
+    :param strict: require summed indices to appear once up and once down
+    :return: Contraction
+    """
+    return Contraction(expr, strict)
+
+
+def contract(expr, *operands, strict=True):
+    """
+    Evaluate an index expression on the operands, in the order of the factors.
+
+    :param expr: index expression, e.g. 'R^a_{bac}' or 'g^{ab} Γ_{bcd}'
+    :param strict: require summed indices to appear once up and once down
+    :return: the contracted array, indexed by the free indices
+    """
+    return compile_expression(expr, strict)(*operands)
+
+
+def test_parse():
+    c = compile_expression('R^a_{bac}')
+    assert c.subscripts == 'abac->bc' and c.output == '_{bc}'
+    c = compile_expression('g^{ab} Γ_{bcd}')
+    assert c.names == ['g', 'Γ'] and c.subscripts == 'ab,bcd->acd' and c.output == '^a_{cd}'
+    c = compile_expression('A_μB^μ')
+    assert c.names == ['A', 'B'] and c.subscripts == 'a,a->'
+    c = compile_expression('Γ^a_{bc} -> _{cb}^a')
+    assert c.subscripts == 'abc->cba'
+    for bad in ['g_{ab} Γ_{bcd}', 'A_a B^a C^a', 'T_{ab} -> _c']:
+        try:
+            compile_expression(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"'{bad}' should be rejected")
+    assert compile_expression('g_{ab} Γ_{bcd}', strict=False).subscripts == 'ab,bcd->acd'
+
+
+def test_contract():
+    rng = np.random.default_rng(0)
+    g, gamma = rng.normal(size=(4, 4)), rng.normal(size=(4, 4, 4))
+    assert np.allclose(contract('g^{ab} Γ_{bcd}', g, gamma), np.tensordot(g, gamma, axes=(1, 0)))
+    riemann = rng.normal(size=(4, 4, 4, 4))
+    assert np.allclose(contract('R^a_{bac}', riemann), np.einsum('abac->bc', riemann))
+
+    # a chain of matrices is contracted in the cheap order, and the path is reused
+    a, b, c = rng.normal(size=(50, 2)), rng.normal(size=(2, 50)), rng.normal(size=(50, 3))
+    chain = compile_expression('A^i_j B^j_k C^k_l')
+    assert np.allclose(chain(a, b, c), a @ (b @ c))
+    assert chain.path(a, b, c) is chain.path(a, b, c)
+    # large steps run on tensordot, including the transpose to the output order
+    a, b, c = rng.normal(size=(40, 30)), rng.normal(size=(30, 50)), rng.normal(size=(20, 50))
+    assert np.allclose(contract('A^i_j B^j_k C_l^k -> _l^i', a, b, c), (a @ b @ c.T).T)
+
+
+def test_plan():
+    # the plan is built once per shapes; small steps run on einsum, large ones on tensordot
+    chain = compile_expression('A^i_j B^j_k C^k_l')
+    small = ((50, 2), (2, 50), (50, 3))
+    assert chain._plan(small) is chain._plan(small)
+    assert all(axes is None for _, _, axes, _ in chain._plan(small)[1])
+    large = ((100, 100),) * 3
+    assert all(axes is not None for _, _, axes, _ in chain._plan(large)[1])
+    # a single contraction is one einsum step, whatever its size
+    steps = compile_expression('R^a_{bac}')._plan(((64, 64, 64, 64),))[1]
+    assert len(steps) == 1 and steps[0][1] == 'abac->bc' and steps[0][2] is None
+    # the path search allocates no arrays of the operand size
+    huge = ((10 ** 5, 10 ** 5), (10 ** 5, 10 ** 5))
+    assert len(compile_expression('A^i_j B^j_k')._plan(huge)[1]) == 1
+
+
+def test_curvature_of_sphere():
+    # Ricci scalar of the 2-sphere of radius r, cf. coordinate_systems/main.py, with sympy objects
+    import sympy as sp
+    r, theta, phi = sp.symbols('r theta phi', positive=True)
+    coords = [theta, phi]
+    g = np.diag([r ** 2, r ** 2 * sp.sin(theta) ** 2])
+    g_up = np.array(sp.Matrix(g).inv())
+    dg = np.array([[[sp.diff(g[a, b], x) for x in coords] for b in range(2)] for a in range(2)])  # g_{ab,c}
+
+    gamma_low = (dg + contract('D_{acb} -> _{abc}', dg) - contract('D_{bca} -> _{abc}', dg)) / 2
+    gamma = contract('g^{ad} Γ_{dbc}', g_up, gamma_low)  # Γ^a_{bc}
+    d_gamma = np.array([[[[sp.diff(gamma[a, b, c], x) for x in coords] for c in range(2)]
+                         for b in range(2)] for a in range(2)])  # Γ^a_{bc,d}
+    gamma_gamma = contract('Γ^a_{ce} Γ^e_{bd} -> ^a_{bcd}', gamma, gamma)  # Γ^a_{ce}Γ^e_{bd}
+    riemann = contract('D^a_{bdc} -> ^a_{bcd}', d_gamma) + gamma_gamma
+    riemann = riemann - contract('R^a_{bdc} -> ^a_{bcd}', riemann)
+    ricci = contract('R^a_{bac}', riemann)
+    scalar = contract('g^{ab} R_{ab}', g_up, ricci)
+    assert sp.simplify(scalar - 2 / r ** 2) == 0
+
+
+if __name__ == '__main__':
+    test_parse()
+    test_contract()
+    test_plan()
+    test_curvature_of_sphere()
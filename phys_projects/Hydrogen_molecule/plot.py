@@ -14,22 +14,38 @@ def func_D(r):
     return - (1 + r) * np.exp(-r)
 
 
-ws = np.linspace(0.01, 25, 1000)
-alpha = (1 - 2 * func_D(ws) - func_C(ws)) / (1 - 2 * func_D(ws) - func_S(ws))
-rs = ws / alpha
-
-print(alpha.argmax())
-
-i = alpha.argmax()
-print(alpha[-1])
-
-plt.figure(figsize=(5, 4), dpi=300)
-plt.plot(rs, alpha, label='$\\alpha(R)$')
-plt.plot(rs[i], alpha[i], '*',
-         label='$R=%.3f, \\alpha_{max} = %.3f$' % (rs[i], alpha[i]))
-plt.plot(rs, np.ones_like(rs), '--', label='$\\alpha=1$')
-plt.xlabel('r')
-plt.ylabel('$\\alpha$')
-plt.legend()
-plt.title('Variational LCAO $\\alpha(R)$')
-plt.savefig('vLCAO.png', transparent=False)
+def compute(w_min, w_max, n):
+    ws = np.linspace(w_min, w_max, n)
+    alpha = (1 - 2 * func_D(ws) - func_C(ws)) / (1 - 2 * func_D(ws) - func_S(ws))
+    rs = ws / alpha
+    return {'rs': rs, 'alpha': alpha}
+
+
+def render(data, output):
+    rs, alpha = data['rs'], data['alpha']
+    i = alpha.argmax()
+
+    plt.figure(figsize=(5, 4), dpi=300)
+    plt.plot(rs, alpha, label='$\\alpha(R)$')
+    plt.plot(rs[i], alpha[i], '*',
+             label='$R=%.3f, \\alpha_{max} = %.3f$' % (rs[i], alpha[i]))
+    plt.plot(rs, np.ones_like(rs), '--', label='$\\alpha=1$')
+    plt.xlabel('r')
+    plt.ylabel('$\\alpha$')
+    plt.legend()
+    plt.title('Variational LCAO $\\alpha(R)$')
+    plt.savefig(output, transparent=False)
+
+
+# Figures built by build_figures.py
+FIGURES = [
+    {'output': 'vLCAO.png', 'data': compute, 'params': {'w_min': 0.01, 'w_max': 25, 'n': 1000}, 'render': render},
+]
+
+
+if __name__ == '__main__':
+    figure = FIGURES[0]
+    data = figure['data'](**figure['params'])
+    print(data['alpha'].argmax())
+    print(data['alpha'][-1])
+    figure['render'](data, figure['output'])
@@ -7,31 +7,45 @@ def landau_free_energy(phi, a, b):
     return a * phi ** 2 + b * phi ** 4
 
 
-# 定义序参量的范围
-phi = np.linspace(-2, 2, 400)
-
 # 设置不同参数
 parameters = [
     {"a": 2, "b": 1, "label": "a > 0, b > 0"},
     {"a": -2, "b": 1, "label": "a < 0, b > 0"},
 ]
 
-# 创建图像
-plt.figure(figsize=(6, 4))
-
-for params in parameters:
-    a = params["a"]
-    b = params["b"]
-    F = landau_free_energy(phi, a, b)
-    plt.plot(phi, F, label=params["label"])
-
-# 添加图例和标签
-plt.title('Landau Functional $F(\\phi)=a(T)\\phi^2+b(T)\\phi^4$')
-plt.xlabel('Order Parameter ($\\phi$)')
-plt.ylabel('Free Energy (F)')
-plt.legend()
-# plt.grid(True)
-
-# 显示图像
-plt.tight_layout()
-plt.savefig('landau_functional.svg', transparent=True)
+
+def compute(n):
+    # 定义序参量的范围
+    phi = np.linspace(-2, 2, n)
+    F = np.array([landau_free_energy(phi, params["a"], params["b"]) for params in parameters])
+    return {'phi': phi, 'F': F}
+
+
+def render(data, output):
+    # 创建图像
+    plt.figure(figsize=(6, 4))
+
+    for params, F in zip(parameters, data['F']):
+        plt.plot(data['phi'], F, label=params["label"])
+
+    # 添加图例和标签
+    plt.title('Landau Functional $F(\\phi)=a(T)\\phi^2+b(T)\\phi^4$')
+    plt.xlabel('Order Parameter ($\\phi$)')
+    plt.ylabel('Free Energy (F)')
+    plt.legend()
+    # plt.grid(True)
+
+    # 显示图像
+    plt.tight_layout()
+    plt.savefig(output, transparent=True)
+
+
+# Figures built by build_figures.py
+FIGURES = [
+    {'output': 'landau_functional.svg', 'data': compute, 'params': {'n': 400}, 'render': render},
+]
+
+
+if __name__ == '__main__':
+    for figure in FIGURES:
+        figure['render'](figure['data'](**figure['params']), figure['output'])
@@ -1,38 +1,53 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-# 定义温度范围，从低温到高温（高于居里温度）
-T = np.linspace(0, 2, 400)  # 归一化温度 T/T_C
+from mean_field import magnetization_grid
 
-# 定义铁磁体相变的磁化强度关系
-# 这里使用一个简单的近似模型：M(T) = (1 - T/T_C)^beta
-# 当 T < T_C 时，磁化强度为 (1 - T)^0.5，当 T >= T_C 时，磁化强度为 0
-T_C = 1
-beta = 0.5
-M = np.where(T <= T_C, (1 - T/T_C)**beta / 2, 0)
 
-# 创建图像
-plt.figure(figsize=(4, 3))
+def compute(T_C, n):
+    # 定义温度范围，从低温到高温（高于居里温度）
+    T = np.linspace(0, 2, n)  # 归一化温度 T/T_C
 
-plt.plot(T, M, label='Magnetization $\\langle M \\rangle$', color='b')
-plt.axvline(x=T_C, color='r', linestyle='--', label='Curie Temperature $T_C$')
+    # 定义铁磁体相变的磁化强度关系
+    # 零场下自洽求解平均场方程 M = tanh(T_C M / T)
+    # 当 T < T_C 时 M ~ (1 - T/T_C)^0.5，当 T >= T_C 时，磁化强度为 0
+    M = magnetization_grid(T, np.array([0.0]), T_C=T_C)[0][:, 0]
+    return {'T': T, 'M': M, 'T_C': T_C}
 
-# 添加图例和标签
-plt.title('Phase transition of a Ferromagnet')
-plt.xlabel('Temperature $T/T_C$')
-plt.ylabel('Magnetization $\\langle M\\rangle$')
-plt.legend()
 
+def render(data, output):
+    # 创建图像
+    plt.figure(figsize=(4, 3))
 
-ax = plt.gca()
+    plt.plot(data['T'], data['M'], label='Magnetization $\\langle M \\rangle$', color='b')
+    plt.axvline(x=data['T_C'], color='r', linestyle='--', label='Curie Temperature $T_C$')
 
-ax.set_xlim(0, 2)
-ax.set_ylim(0, 1)
-ax.tick_params(left=False, bottom=False)
-# 隐藏刻度数字
-ax.set_xticklabels([])
-ax.set_yticklabels([])
+    # 添加图例和标签
+    plt.title('Phase transition of a Ferromagnet')
+    plt.xlabel('Temperature $T/T_C$')
+    plt.ylabel('Magnetization $\\langle M\\rangle$')
+    plt.legend()
 
-# 显示图像
-plt.tight_layout()
-plt.savefig('ferromagnet.svg', transparent=True)
+    ax = plt.gca()
+
+    ax.set_xlim(0, 2)
+    ax.set_ylim(0, 1)
+    ax.tick_params(left=False, bottom=False)
+    # 隐藏刻度数字
+    ax.set_xticklabels([])
+    ax.set_yticklabels([])
+
+    # 显示图像
+    plt.tight_layout()
+    plt.savefig(output, transparent=True)
+
+
+# Figures built by build_figures.py
+FIGURES = [
+    {'output': 'ferromagnet.svg', 'data': compute, 'params': {'T_C': 1, 'n': 400}, 'render': render},
+]
+
+
+if __name__ == '__main__':
+    for figure in FIGURES:
+        figure['render'](figure['data'](**figure['params']), figure['output'])
@@ -0,0 +1,301 @@
+"""
+Harmonic lattice dynamics of crystals with arbitrary unit cells in 1, 2 or 3 dimensions.
+
+A crystal is given by its primitive vectors (rows of `lattice`), the cartesian positions
+and masses of the n atoms in the cell, and a list of central springs (bonds)
+    (i, j, R, k):  atom i in cell 0 is connected to atom j in cell R by a spring k,
+with R the integer coordinates of the cell. The pair energy of a bond is
+    k/2 * (e . (u_j(R) - u_i(0)))^2,   e the unit vector along the bond.
+
+The dynamical matrix is assembled as D(q) = sum_R C_R exp(i q.R) from the mass-weighted
+force-constant blocks C_R, for all k-points at once as an (Nk, dn, dn) stack, and
+diagonalized batch-wise. For the monatomic chain this reduces to
+    omega(q) = 2 sqrt(k/m) |sin(q a / 2)|,
+see phonon.py.
+"""
+
+import numpy as np
+
+# Number of complex matrix elements per batch, i.e. about 64 MB per (Nk, dn, dn) chunk
+PHONON_CHUNK = 2 ** 22
+
+# Six tetrahedra sharing the main diagonal of a cube of the k-grid, corners labelled by
+# 4 * b1 + 2 * b2 + b3 for the corner offset (b1, b2, b3)
+CUBE_TETRAHEDRA = np.array([[0, 1, 3, 7], [0, 1, 5, 7], [0, 2, 3, 7],
+                            [0, 2, 6, 7], [0, 4, 5, 7], [0, 4, 6, 7]])
+
+
+def neighbour_bonds(lattice, positions, cutoff, spring=1.0):
+    """
+    All bonds of length up to `cutoff`, each pair counted once, with spring constant `spring`.
+
+    Cells up to ceil(cutoff / min|a_i|) + 1 away are searched, which is enough unless the
+    cell is strongly skewed.
+
+    :param lattice: primitive vectors as rows, shape (d, d)
+    :param positions: cartesian atomic positions, shape (n, d)
+    :return: list of bonds (i, j, R, k)
+    """
+    lattice = np.atleast_2d(np.asarray(lattice, dtype=float))
+    positions = np.atleast_2d(np.asarray(positions, dtype=float))
+    d = lattice.shape[0]
+    m = int(np.ceil(cutoff / np.linalg.norm(lattice, axis=1).min())) + 1
+    cells = np.stack(np.meshgrid(*[np.arange(-m, m + 1)] * d, indexing='ij'), axis=-1).reshape(-1, d)
+
+    bonds = []
+    for i, j in zip(*np.triu_indices(len(positions))):
+        r = positions[j] + cells @ lattice - positions[i]
+        dist = np.linalg.norm(r, axis=1)
+        hit = (dist > 1e-10) & (dist <= cutoff * (1 + 1e-10))
+        if i == j:
+            # (i, i, R) and (i, i, -R) are the same bond: keep the lexicographically positive R
+            first = np.argmax(cells != 0, axis=1)
+            hit &= cells[np.arange(len(cells)), first] > 0
+        bonds += [(i, j, tuple(R), spring) for R in cells[hit]]
+    return bonds
+
+
+def force_constants(lattice, positions, masses, bonds):
+    """
+    Mass-weighted force constants C_R = Phi(0, R) / sqrt(m_i m_j) of the crystal.
+
+    :param lattice: primitive vectors as rows, shape (d, d)
+    :param positions: cartesian atomic positions, shape (n, d)
+    :param masses: atomic masses, shape (n,)
+    :param bonds: list of bonds (i, j, R, k)
+    :return: cartesian cell vectors R, shape (Nt, d), and blocks C_R, shape (Nt, dn, dn)
+    """
+    lattice = np.atleast_2d(np.asarray(lattice, dtype=float))
+    positions = np.atleast_2d(np.asarray(positions, dtype=float))
+    masses = np.asarray(masses, dtype=float).reshape(-1)
+    n, d = positions.shape
+    if lattice.shape != (d, d) or masses.shape != (n,):
+        raise ValueError("Shapes of lattice, positions and masses are not consistent.")
+
+    terms = {(0,) * d: np.zeros((n * d, n * d))}
+
+    def add(R, i, j, block):
+        c = terms.setdefault(R, np.zeros((n * d, n * d)))
+        c[i * d:(i + 1) * d, j * d:(j + 1) * d] += block
+
+    for i, j, R, k in bonds:
+        R = tuple(int(x) for x in np.atleast_1d(R))
+        r = positions[j] + np.array(R) @ lattice - positions[i]
+        e = r / np.linalg.norm(r)
+        phi = k * np.outer(e, e)
+        add(R, i, j, -phi)
+        add(tuple(-x for x in R), j, i, -phi)
+        add((0,) * d, i, i, phi)
+        add((0,) * d, j, j, phi)
+
+    cells = np.array(list(terms.keys()), dtype=float).reshape(-1, d)
+    weight = 1 / np.sqrt(np.repeat(masses, d))
+    blocks = np.array(list(terms.values())) * np.outer(weight, weight)
+    return cells @ lattice, blocks
+
+
+def dynamical_matrix(q, fc):
+    """
+    Dynamical matrices D(q) = sum_R C_R exp(i q.R) for a stack of wave vectors.
+
+    :param q: wave vectors, shape (Nk, d)
+    :param fc: force constants (R, C_R) from force_constants()
+    :return: Hermitian matrices, shape (Nk, dn, dn)
+    """
+    cells, blocks = fc
+    q = np.asarray(q, dtype=float).reshape(-1, cells.shape[1])
+    phases = np.exp(1j * (q @ cells.T))
+    return np.tensordot(phases, blocks, axes=(1, 0))
+
+
+def phonon_frequencies(q, fc, return_modes=False):
+    """
+    Phonon frequencies omega_s(q) by batched diagonalization of D(q).
+
+    The k-points are processed in chunks of about PHONON_CHUNK matrix elements, so that
+    10^6 k-points need no more memory than a few chunks. Unstable modes (omega^2 < 0) are
+    returned as negative frequencies -sqrt|omega^2|.
+
+    :param q: wave vectors, shape (Nk, d)
+    :param fc: force constants (R, C_R) from force_constants()
+    :param return_modes: also return the polarization vectors
+    :return: omega of shape (Nk, dn) in ascending order, and modes of shape (Nk, dn, dn)
+    """
+    cells, blocks = fc
+    q = np.asarray(q, dtype=float).reshape(-1, cells.shape[1])
+    dn = blocks.shape[1]
+    chunk = max(1, PHONON_CHUNK // dn ** 2)
+
+    omega = np.empty((len(q), dn))
+    modes = np.empty((len(q), dn, dn), dtype=complex) if return_modes else None
+    for start in range(0, len(q), chunk):
+        dyn = dynamical_matrix(q[start:start + chunk], fc)
+        if return_modes:
+            w2, modes[start:start + chunk] = np.linalg.eigh(dyn)
+        else:
+            w2 = np.linalg.eigvalsh(dyn)
+        omega[start:start + chunk] = np.sign(w2) * np.sqrt(np.abs(w2))
+    return (omega, modes) if return_modes else omega
+
+
+def monkhorst_pack(lattice, mesh):
+    """
+    Gamma-centred uniform grid of wave vectors in the first Brillouin zone (up to
+    reciprocal lattice vectors), in C order so that it reshapes to `mesh`.
+
+    :param lattice: primitive vectors as rows, shape (d, d)
+    :param mesh: number of points along each reciprocal vector, e.g. (n1, n2, n3)
+    :return: wave vectors, shape (prod(mesh), d)
+    """
+    lattice = np.atleast_2d(np.asarray(lattice, dtype=float))
+    reciprocal = 2 * np.pi * np.linalg.inv(lattice).T  # b_i as rows, a_i . b_j = 2 pi delta_ij
+    axes = [(np.arange(n) / n + 0.5) % 1 - 0.5 for n in mesh]
+    frac = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(mesh))
+    return frac @ reciprocal
+
+
+def dos_histogram(omega, bins=200):
+    """
+    Phonon density of states by histogramming the frequencies of a uniform k-grid.
+
+    :param omega: frequencies, shape (Nk, dn)
+    :param bins: number of bins or bin edges, as for np.histogram
+    :return: g, edges with g normalized to dn states per cell
+    """
+    omega = np.asarray(omega, dtype=float)
+    counts, edges = np.histogram(omega, bins)
+    return counts / (omega.shape[0] * np.diff(edges)), edges
+
+
+def _tetrahedron_fraction(e, E):
+    """
+    Fraction of a tetrahedron with sorted corner energies e (shape (M, 4)) lying below E,
+    for e1 < E <= e4, from the linear interpolation of the energy inside the tetrahedron.
+    """
+    e1, e2, e3, e4 = e.T
+    frac = np.empty_like(E)
+
+    low = E < e2
+    x, a, b, c = E[low] - e1[low], e2[low] - e1[low], e3[low] - e1[low], e4[low] - e1[low]
+    frac[low] = x ** 3 / (a * b * c)
+
+    mid = ~low & (E < e3)
+    x = E[mid] - e2[mid]
+    e21, e31, e41 = e2[mid] - e1[mid], e3[mid] - e1[mid], e4[mid] - e1[mid]
+    e32, e42 = e3[mid] - e2[mid], e4[mid] - e2[mid]
+    frac[mid] = (e21 ** 2 + 3 * e21 * x + 3 * x ** 2 - (e31 + e42) / (e32 * e42) * x ** 3) / (e31 * e41)
+
+    high = ~low & ~mid & (E < e4)
+    x, a, b, c = e4[high] - E[high], e4[high] - e1[high], e4[high] - e2[high], e4[high] - e3[high]
+    frac[high] = 1 - x ** 3 / (a * b * c)
+
+    frac[E >= e4] = 1
+    return frac
+
+
+def dos_tetrahedron(omega, mesh, bins=200):
+    """
+    Phonon density of states by the linear tetrahedron method on a periodic 3D k-grid.
+
+    Each cube of the grid is split into six tetrahedra, inside which omega is linearly
+    interpolated. The number of states below every bin edge is accumulated only from the
+    tetrahedra whose energy range covers that edge, so the cost grows with the number of
+    tetrahedra times the bins they span, not with the total number of bins.
+
+    :param omega: frequencies on the grid of monkhorst_pack(lattice, mesh), shape (Nk, dn)
+    :param mesh: grid dimensions (n1, n2, n3)
+    :param bins: number of bins or bin edges, as for np.histogram
+    :return: g, edges with g normalized to dn states per cell
+    """
+    omega = np.asarray(omega, dtype=float)
+    if len(mesh) != 3 or omega.shape[0] != np.prod(mesh):
+        raise ValueError("The tetrahedron method needs frequencies on a 3D grid of shape `mesh`.")
+    edges = np.histogram_bin_edges(omega, bins)
+    dn = omega.shape[1]
+
+    # grid indices of the eight corners of every cube, with periodic wrap-around
+    index = np.arange(omega.shape[0]).reshape(mesh)
+    corners = np.stack([np.roll(index, (-(c >> 2), -((c >> 1) & 1), -(c & 1)), axis=(0, 1, 2)).ravel()
+                        for c in range(8)], axis=-1)
+    tetrahedra = corners[:, CUBE_TETRAHEDRA].reshape(-1, 4)
+
+    counts = np.zeros(len(edges))
+    chunk = max(1, PHONON_CHUNK // (4 * dn))
+    for start in range(0, len(tetrahedra), chunk):
+        e = np.sort(omega[tetrahedra[start:start + chunk]], axis=1)  # (M, 4, dn)
+        e = e.transpose(0, 2, 1).reshape(-1, 4)
+
+        lo = np.searchsorted(edges, e[:, 0], side='right')
+        hi = np.searchsorted(edges, e[:, 3], side='right')
+        # edges above the whole tetrahedron count it in full
+        counts += np.cumsum(np.bincount(hi, minlength=len(edges) + 1))[:len(edges)]
+        # as in np.histogram, the last bin is closed: flat tetrahedra at the top edge count
+        counts[-1] += np.count_nonzero((e[:, 0] == edges[-1]) & (e[:, 3] == edges[-1]))
+
+        # edges inside (e1, e4] count the fraction below them
+        span = hi - lo
+        owner = np.repeat(np.arange(len(e)), span)
+        k = lo[owner] + np.arange(span.sum()) - np.repeat(np.cumsum(span) - span, span)
+        frac = _tetrahedron_fraction(e[owner], edges[k])
+        counts += np.bincount(k, weights=frac, minlength=len(edges))
+
+    return np.diff(counts) / (len(tetrahedra) * np.diff(edges)), edges
+
+
+def monatomic_chain(k=1.0, m=1.0, a=1.0):
+    """
+    Force constants of the monatomic chain with nearest-neighbour springs.
+    """
+    return force_constants([[a]], [[0.0]], [m], [(0, 0, (1,), k)])
+
+
+def test_monatomic_chain():
+    k, m, a = 2.0, 0.5, 1.5
+    q = np.linspace(-np.pi / a, np.pi / a, 401)[:, None]
+    omega = phonon_frequencies(q, monatomic_chain(k, m, a))
+    assert np.allclose(omega[:, 0], 2 * np.sqrt(k / m) * np.abs(np.sin(q[:, 0] * a / 2)))
+
+    # DOS of the chain: g(w) = 2 / (pi sqrt(w_max^2 - w^2)), away from the singularity
+    omega = phonon_frequencies(monkhorst_pack([[1.0]], (200000,)), monatomic_chain())
+    g, edges = dos_histogram(omega, np.linspace(0, 2, 41))
+    w = (edges[1:] + edges[:-1]) / 2
+    assert np.allclose(g[:-2], 2 / (np.pi * np.sqrt(4 - w[:-2] ** 2)), rtol=1e-2)
+
+
+def test_diatomic_chain():
+    # alternating masses with springs k: w^2 = k (1/m1 + 1/m2) -+ k sqrt((1/m1 + 1/m2)^2 - 4 sin^2(qa/2) / (m1 m2))
+    k, m1, m2, a = 1.0, 1.0, 3.0, 2.0
+    bonds = [(0, 1, (0,), k), (1, 0, (1,), k)]
+    fc = force_constants([[a]], [[0.0], [a / 2]], [m1, m2], bonds)
+    q = np.linspace(-np.pi / a, np.pi / a, 101)[:, None]
+    omega = phonon_frequencies(q, fc)
+    s = k * (1 / m1 + 1 / m2)
+    root = np.sqrt(s ** 2 - 4 * k ** 2 * np.sin(q[:, 0] * a / 2) ** 2 / (m1 * m2))
+    expected = np.sqrt(np.clip(np.stack([s - root, s + root], axis=1), 0, None))
+    assert np.allclose(omega, expected, atol=1e-7)
+
+
+def test_simple_cubic():
+    # nearest-neighbour central springs decouple into three chains along x, y, z
+    lattice = np.eye(3)
+    fc = force_constants(lattice, [[0, 0, 0]], [1.0], neighbour_bonds(lattice, [[0, 0, 0]], 1.0))
+    mesh = (24, 24, 24)
+    q = monkhorst_pack(lattice, mesh)
+    omega = phonon_frequencies(q, fc)
+    assert np.allclose(omega, np.sort(2 * np.abs(np.sin(q / 2)), axis=1))
+
+    # with next-nearest neighbours the modes disperse in all directions
+    fc = force_constants(lattice, [[0, 0, 0]], [1.0], neighbour_bonds(lattice, [[0, 0, 0]], np.sqrt(2)))
+    mesh = (16, 16, 16)
+    g_tet, edges = dos_tetrahedron(phonon_frequencies(monkhorst_pack(lattice, mesh), fc), mesh, 30)
+    g_hist, _ = dos_histogram(phonon_frequencies(monkhorst_pack(lattice, (64, 64, 64)), fc), edges)
+    assert np.isclose(np.sum(g_tet * np.diff(edges)), 3)
+    assert np.isclose(np.sum(g_hist * np.diff(edges)), 3)
+    # the tetrahedron DOS of the coarse grid matches the histogram of a much finer one
+    assert np.abs(g_tet - g_hist).max() < 0.1 * g_hist.max()
+
+
+if __name__ == '__main__':
+    test_monatomic_chain()
+    test_diatomic_chain()
+    test_simple_cubic()
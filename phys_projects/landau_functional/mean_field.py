@@ -0,0 +1,291 @@
+"""
+Mean-field theory of a ferromagnet, solved self-consistently on dense (T, h) grids.
+
+The magnetization per spin (normalized to M=1 at saturation) satisfies
+    M = B_J(c_J * (T_C * M + h) / T),    c_J = 3J / (J + 1)
+where B_J is the Brillouin function. The factor c_J is chosen so that the Curie
+temperature is T_C for every J; J=1/2 gives the familiar M = tanh((T_C * M + h) / T),
+J=inf the classical (Langevin) magnet.
+
+All solvers are vectorized: every element carries its own convergence flag and only the
+unconverged elements are iterated further. Grids are swept with continuation, i.e. each
+row of the grid starts from the solution of its neighbour.
+"""
+
+import numpy as np
+
+# Default convergence settings
+MF_TOL = 1e-12  # tolerance on the residual |M - B_J(x)|
+MF_MAXITER = 100  # maximum number of Newton / fixed-point iterations
+
+
+def _langevin(y):
+    """
+    Langevin function L(y) = coth(y) - 1/y, using its Taylor series near y=0.
+    """
+    y = np.asarray(y, dtype=float)
+    small = np.abs(y) < 1e-2
+    y2 = y * y
+    series = y * (1 / 3 - y2 * (1 / 45 - y2 * (2 / 945 - y2 / 4725)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exact = 1 / np.tanh(y) - 1 / y
+    return np.where(small, series, exact)
+
+
+def _d_langevin(y):
+    """
+    Derivative L'(y) = 1/y^2 - 1/sinh^2(y), using its Taylor series near y=0.
+    """
+    y = np.asarray(y, dtype=float)
+    small = np.abs(y) < 1e-2
+    y2 = y * y
+    series = 1 / 3 - y2 * (1 / 15 - y2 * (2 / 189 - y2 / 675))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        exact = 1 / y2 - 1 / np.sinh(y) ** 2
+    return np.where(small, series, exact)
+
+
+def curie_factor(j):
+    """
+    Factor c_J = 3J / (J + 1) that makes T_C the Curie temperature for spin J.
+    """
+    return 3.0 if np.isinf(j) else 3 * j / (j + 1)
+
+
+def brillouin(j, x):
+    """
+    Brillouin function B_J(x) = a coth(a x) - b coth(b x), a = (2J+1)/(2J), b = 1/(2J).
+
+    :param j: spin quantum number J > 0, np.inf for the classical limit
+    :param x: argument, array-like
+    :return: B_J(x), same shape as x
+    """
+    if j == 0.5:
+        return np.tanh(x)
+    if np.isinf(j):
+        return _langevin(x)
+    a = (2 * j + 1) / (2 * j)
+    b = 1 / (2 * j)
+    # the 1/x terms of the two coth cancel exactly
+    return a * _langevin(a * x) - b * _langevin(b * x)
+
+
+def d_brillouin(j, x):
+    """
+    Derivative B_J'(x) of the Brillouin function.
+    """
+    if j == 0.5:
+        return 1 - np.tanh(x) ** 2
+    if np.isinf(j):
+        return _d_langevin(x)
+    a = (2 * j + 1) / (2 * j)
+    b = 1 / (2 * j)
+    return a ** 2 * _d_langevin(a * x) - b ** 2 * _d_langevin(b * x)
+
+
+def solve_magnetization(T, h, T_C=1.0, j=0.5, m0=None, tol=MF_TOL, max_iter=MF_MAXITER):
+    """
+    Solve M = B_J(c_J (T_C M + h) / T) element-wise for broadcast arrays T and h.
+
+    Newton steps are taken where the residual has positive slope, which is the case on
+    the stable branches. Where it has not, the iterate lies between a stable and the
+    unstable solution (or the stable branch has just ended at a spinodal), and it is reset
+    to saturation M = -sign(residual), from where Newton converges monotonically to the
+    outermost stable solution on that side. Only roots with positive slope are accepted, so
+    an iterate sitting exactly on the unstable solution, e.g. m0=0 below T_C at h=0, is
+    reset to saturation along sign(m0) (+1 for m0=0). Hence the solver follows the
+    (meta)stable branch closest to the initial guess m0 and never converges to the unstable
+    one.
+
+    :param T: temperature, T >= 0
+    :param h: external field (in units of the exchange field)
+    :param T_C: Curie temperature
+    :param j: spin quantum number J, np.inf for the classical limit
+    :param m0: initial guess, by default the ordered branch sign(h) (+1 for h=0)
+    :return: m, converged
+    """
+    T, h = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(h, dtype=float))
+    if np.any(T < 0):
+        raise ValueError("Temperature must be non-negative.")
+    if m0 is None:
+        m0 = np.where(h < 0, -1.0, 1.0)
+    m = np.array(np.broadcast_to(m0, T.shape), dtype=float)
+    converged = np.zeros(T.shape, dtype=bool)
+
+    # T=0: the spins are saturated along the local field
+    zero = T == 0
+    if np.any(zero):
+        field = T_C * m[zero] + h[zero]
+        m[zero] = np.where(field < 0, -1.0, 1.0)
+        converged[zero] = True
+
+    c = curie_factor(j)
+    idx = np.flatnonzero(~converged)
+    t_flat, h_flat, m_flat, conv_flat = T.ravel(), h.ravel(), m.reshape(-1), converged.reshape(-1)
+    t_act, h_act, m_act = t_flat[idx], h_flat[idx], m_flat[idx]
+
+    for _ in range(max_iter):
+        if idx.size == 0:
+            break
+        x = c * (T_C * m_act + h_act) / t_act
+        b = brillouin(j, x)
+        f = m_act - b
+        slope = 1 - d_brillouin(j, x) * c * T_C / t_act
+
+        done = (np.abs(f) < tol) & (slope > 0)
+        m_flat[idx[done]] = m_act[done]
+        conv_flat[idx[done]] = True
+
+        keep = ~done
+        idx, t_act, h_act, m_act = idx[keep], t_act[keep], h_act[keep], m_act[keep]
+        f, slope = f[keep], slope[keep]
+
+        newton = slope > 1e-8
+        with np.errstate(divide='ignore', invalid='ignore'):
+            saturation = np.where(f == 0, np.where(m_act < 0, -1.0, 1.0), -np.sign(f))
+            m_act = np.where(newton, m_act - f / slope, saturation)
+        np.clip(m_act, -1.0, 1.0, out=m_act)
+
+    m_flat[idx] = m_act
+    return m, converged
+
+
+def magnetization_grid(T, h, T_C=1.0, j=0.5, tol=MF_TOL, max_iter=MF_MAXITER):
+    """
+    Magnetization on the (T, h) grid, swept with continuation in T.
+
+    Rows are solved from the lowest temperature upwards, all fields at once, with each row
+    started from the solution of the previous one. The first row starts on the ordered
+    branch sign(h), so for h=0 the spontaneous magnetization M >= 0 is returned.
+
+    :param T: 1D array of temperatures, shape (nt,)
+    :param h: 1D array of fields, shape (nh,)
+    :return: m, converged, both of shape (nt, nh)
+    """
+    T = np.asarray(T, dtype=float)
+    h = np.asarray(h, dtype=float)
+    if T.ndim != 1 or h.ndim != 1:
+        raise ValueError("T and h must be 1D arrays.")
+
+    m = np.empty((T.size, h.size))
+    converged = np.empty((T.size, h.size), dtype=bool)
+    guess = np.where(h < 0, -1.0, 1.0)
+    for i in np.argsort(T, kind='stable'):
+        m[i], converged[i] = solve_magnetization(T[i], h, T_C, j, guess, tol, max_iter)
+        guess = m[i]
+    return m, converged
+
+
+def hysteresis_loop(T, h_max, n_h=201, T_C=1.0, j=0.5, tol=MF_TOL, max_iter=MF_MAXITER):
+    """
+    Hysteresis loops M(h) for several temperatures, swept with continuation in h.
+
+    The field runs from +h_max down to -h_max and back up. At each field step all
+    temperatures are solved at once, starting from the previous step, so below T_C the
+    metastable branch is followed until it ends at the spinodal field.
+
+    :param T: 1D array of temperatures, shape (nt,)
+    :param h_max: amplitude of the field sweep
+    :param n_h: number of field points per branch
+    :return: h, m, converged with h of shape (2 * n_h,) and m of shape (nt, 2 * n_h)
+    """
+    T = np.asarray(T, dtype=float)
+    down = np.linspace(h_max, -h_max, n_h)
+    h = np.concatenate([down, down[::-1]])
+
+    m = np.empty((T.size, h.size))
+    converged = np.empty((T.size, h.size), dtype=bool)
+    guess = np.ones_like(T)
+    for k, h_k in enumerate(h):
+        m[:, k], converged[:, k] = solve_magnetization(T, h_k, T_C, j, guess, tol, max_iter)
+        guess = m[:, k]
+    return h, m, converged
+
+
+def susceptibility(m, T, h, T_C=1.0, j=0.5):
+    """
+    Differential susceptibility chi = dM/dh of a self-consistent solution m(T, h).
+
+    By implicit differentiation of M = B_J(x), x = c_J (T_C M + h) / T:
+        chi = c_J B_J'(x) / (T - c_J T_C B_J'(x))
+    At T=0 the spins are saturated and chi = 0.
+
+    :return: chi, same shape as the broadcast m, T, h
+    """
+    m, T, h = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (m, T, h)))
+    c = curie_factor(j)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = c * (T_C * m + h) / T
+        db = d_brillouin(j, x)
+        chi = c * db / (T - c * T_C * db)
+    return np.where(T == 0, 0.0, chi)
+
+
+def test_brillouin():
+    x = np.linspace(-5, 5, 1001)
+    # J=1/2 is tanh, also through the general formula
+    a, b = 2.0, 1.0
+    general = a * _langevin(a * x) - b * _langevin(b * x)
+    assert np.allclose(general, np.tanh(x), atol=1e-12)
+    # the slope at the origin is (J+1)/(3J) = 1/c_J for any J
+    for j in [0.5, 1, 3.5, np.inf]:
+        assert np.isclose(d_brillouin(j, 0.0), 1 / curie_factor(j))
+        dx = 1e-6
+        numeric = (brillouin(j, x + dx) - brillouin(j, x - dx)) / (2 * dx)
+        assert np.allclose(numeric, d_brillouin(j, x), atol=1e-8)
+
+
+def test_curie_weiss():
+    # above T_C in zero field M=0 and chi = 1 / (T - T_C)
+    T = np.linspace(1.1, 3, 50)
+    for j in [0.5, 2, np.inf]:
+        m, converged = magnetization_grid(T, np.array([0.0]), j=j)
+        assert converged.all()
+        assert np.allclose(m, 0, atol=1e-10)
+        chi = susceptibility(m[:, 0], T, 0.0, j=j)
+        assert np.allclose(chi, 1 / (T - 1))
+
+    # the saturated state at T=0 has chi = 0, also on a full (T, h) map
+    T, h = np.linspace(0, 2, 101), np.linspace(-0.5, 0.5, 51)
+    m, converged = magnetization_grid(T, h)
+    chi = susceptibility(m, T[:, None], h)
+    assert converged.all() and np.all(np.isfinite(chi))
+    assert np.all(chi[0] == 0)
+
+
+def test_spontaneous_magnetization():
+    T = np.linspace(0, 0.99, 100)
+    m, converged = magnetization_grid(T, np.array([0.0]))
+    assert converged.all()
+    m = m[:, 0]
+    assert m[0] == 1
+    assert np.allclose(m[1:], np.tanh(m[1:] / T[1:]), atol=1e-10)
+    # near T_C: M ~ sqrt(3 (1 - T/T_C))
+    assert np.isclose(m[-1], np.sqrt(3 * 0.01), rtol=1e-2)
+    # a start on the unstable solution M=0 does not stop there
+    m, converged = solve_magnetization(np.full(3, 0.5), 0.0, m0=np.array([0.0, -0.0, -1e-300]))
+    assert converged.all() and np.allclose(m, np.tanh(m / 0.5)) and np.allclose(m * [1, 1, -1], m[0])
+    assert m[0] > 0.9
+
+
+def test_hysteresis():
+    # spinodal field of the J=1/2 magnet: 1 - m*^2 = T/T_C, h_c = T artanh(m*) - T_C m*
+    T = np.array([0.5, 0.8])
+    h, m, converged = hysteresis_loop(T, 1.0, n_h=2001)
+    assert converged.all()
+    m_star = np.sqrt(1 - T)
+    h_c = np.abs(T * np.arctanh(m_star) - m_star)
+    n_h = h.size // 2
+    for i in range(T.size):
+        # on the way down, the magnetization flips just beyond -h_c
+        flip = np.flatnonzero(m[i, :n_h] < 0)[0]
+        assert abs(abs(h[flip]) - h_c[i]) <= 2 * abs(h[1] - h[0])
+        # the loop is symmetric
+        assert np.allclose(m[i, n_h:], -m[i, :n_h])
+
+
+if __name__ == '__main__':
+    test_brillouin()
+    test_curie_weiss()
+    test_spontaneous_magnetization()
+    test_hysteresis()
@@ -7,27 +7,39 @@ def landau_potential_3d(phi, psi):
     return (phi ** 2 + psi ** 2) ** 2 - 2 * (phi ** 2 + psi ** 2)
 
 
-# Generate phi and psi values
-radius = 1.3
+def compute(radius, n):
+    # Generate phi and psi values
+    phi = np.linspace(-radius, radius, n)
+    psi = np.linspace(-radius, radius, n)
+    phi, psi = np.meshgrid(phi, psi)
 
-phi = np.linspace(-radius, radius, 400)
-psi = np.linspace(-radius, radius, 400)
-phi, psi = np.meshgrid(phi, psi)
+    # Calculate the potential values
+    return {'phi': phi, 'psi': psi, 'potential': landau_potential_3d(phi, psi)}
 
-# Calculate the potential values
-potential_3d = landau_potential_3d(phi, psi)
 
-# Plot the 3D Landau functional (Mexican hat potential)
-fig = plt.figure(figsize=(5, 4))
-ax = fig.add_subplot(111, projection='3d')
-ax.plot_surface(phi, psi, potential_3d, cmap='viridis')
+def render(data, output):
+    # Plot the 3D Landau functional (Mexican hat potential)
+    fig = plt.figure(figsize=(5, 4))
+    ax = fig.add_subplot(111, projection='3d')
+    ax.plot_surface(data['phi'], data['psi'], data['potential'], cmap='viridis')
 
-ax.set_xlabel(r'$\varphi_1$')
-ax.set_ylabel(r'$\varphi_2$')
-ax.set_zlabel(r'$V(\varphi_1, \varphi_2)$')
-ax.set_title('"Mexican Hat" Potential')
+    ax.set_xlabel(r'$\varphi_1$')
+    ax.set_ylabel(r'$\varphi_2$')
+    ax.set_zlabel(r'$V(\varphi_1, \varphi_2)$')
+    ax.set_title('"Mexican Hat" Potential')
 
-ax.view_init(elev=30, azim=60)
+    ax.view_init(elev=30, azim=60)
 
-plt.tight_layout()
-plt.savefig('mexican_hat.svg', transparent=True)
+    plt.tight_layout()
+    plt.savefig(output, transparent=True)
+
+
+# Figures built by build_figures.py
+FIGURES = [
+    {'output': 'mexican_hat.svg', 'data': compute, 'params': {'radius': 1.3, 'n': 400}, 'render': render},
+]
+
+
+if __name__ == '__main__':
+    for figure in FIGURES:
+        figure['render'](figure['data'](**figure['params']), figure['output'])
@@ -1,29 +1,49 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-# 定义参数
-k = 1.0  # 弹性常数
-m = 1.0  # 质量
-a = 1.0  # 晶格常数
+from lattice_dynamics import monatomic_chain, phonon_frequencies
 
-# 波矢范围
-K = np.linspace(-np.pi/a, np.pi/a, 400)
 
-# 角频率的色散关系
-omega = 2 * np.sqrt(k / m) * np.abs(np.sin(K * a / 2))
+def compute(k, m, a, n):
+    """
+    :param k: 弹性常数
+    :param m: 质量
+    :param a: 晶格常数
+    """
+    # 波矢范围
+    K = np.linspace(-np.pi/a, np.pi/a, n)
 
-# 创建图像
-plt.figure(figsize=(5, 4))
+    # 角频率的色散关系，对角化动力学矩阵 D(k) 得到
+    omega = phonon_frequencies(K[:, None], monatomic_chain(k, m, a))[:, 0]
+    return {'K': K, 'omega': omega}
 
-plt.plot(K, omega, label='$\\omega(k) = 2 \\sqrt{\\frac{k}{m}} \\left| \\sin\\left(\\frac{ka}{2}\\right) \\right|$', color='b')
 
-# 添加图例和标签
-plt.title('Phonon Dispersion Relation in a Harmonic Crystal')
-plt.xlabel('$k$')
-plt.ylabel('$\\omega$')
-plt.legend()
-plt.grid(True)
+def render(data, output):
+    # 创建图像
+    plt.figure(figsize=(5, 4))
 
-# 显示图像
-plt.tight_layout()
-plt.savefig('phonon.svg', transparent=True)
+    plt.plot(data['K'], data['omega'],
+             label='$\\omega(k) = 2 \\sqrt{\\frac{k}{m}} \\left| \\sin\\left(\\frac{ka}{2}\\right) \\right|$',
+             color='b')
+
+    # 添加图例和标签
+    plt.title('Phonon Dispersion Relation in a Harmonic Crystal')
+    plt.xlabel('$k$')
+    plt.ylabel('$\\omega$')
+    plt.legend()
+    plt.grid(True)
+
+    # 显示图像
+    plt.tight_layout()
+    plt.savefig(output, transparent=True)
+
+
+# Figures built by build_figures.py
+FIGURES = [
+    {'output': 'phonon.svg', 'data': compute, 'params': {'k': 1.0, 'm': 1.0, 'a': 1.0, 'n': 400}, 'render': render},
+]
+
+
+if __name__ == '__main__':
+    for figure in FIGURES:
+        figure['render'](figure['data'](**figure['params']), figure['output'])
@@ -0,0 +1,409 @@
+"""
+Physical units attached to whole NumPy arrays.
+
+A unit is a scale factor to SI together with the exponents of the SI base dimensions
+(mass, length, time, current, temperature). Units are parsed, checked and folded into a
+single float once, when an array is wrapped in a Quantity or converted; the array itself
+stays a plain float64 ndarray, so hot loops run on `.value` without any overhead:
+
+    E = Quantity(np.linspace(0, 1, 5), 'eV')
+    E.to('hartree').value          # one multiplication of the whole array
+    x = E.in_system(ATOMIC)        # plain ndarray in atomic units
+
+Unit expressions are products of registered units with integer or rational powers,
+e.g. 'kg*m^2/s^2' or 'hbar/m_e/bohr^2' (parentheses are only allowed around powers).
+
+Gaussian electromagnetic units (statC, statV, gauss) are registered by their SI
+equivalents, e.g. 1 gauss = 1e-4 T, which makes conversions between them and SI units
+exact. The Gaussian system has a different dimensional structure, though (B and E share
+a unit), so GAUSSIAN only expresses the electromagnetic quantities it lists explicitly,
+charge, current, potential and the E and B fields, and raises for any other dimension
+that involves current.
+"""
+
+import re
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+# Base dimensions, in the order of the exponent tuples
+DIMENSIONS = ('mass', 'length', 'time', 'current', 'temperature')
+
+# Physical constants in SI units (CODATA 2018)
+C_LIGHT = 299792458.0
+H_PLANCK = 6.62607015e-34
+HBAR = H_PLANCK / (2 * np.pi)
+E_CHARGE = 1.602176634e-19
+K_BOLTZMANN = 1.380649e-23
+M_ELECTRON = 9.1093837015e-31
+BOHR_RADIUS = 5.29177210903e-11
+HARTREE = 4.3597447222071e-18
+EPSILON_0 = 8.8541878128e-12
+ATOMIC_MASS = 1.66053906660e-27
+
+
+class Unit:
+    """
+    A physical unit: `scale` SI units of the dimension `dims` (exponents of DIMENSIONS).
+    """
+    __slots__ = ('scale', 'dims')
+
+    def __init__(self, scale, dims):
+        self.scale = float(scale)
+        self.dims = tuple(Fraction(d) for d in dims)
+        if len(self.dims) != len(DIMENSIONS):
+            raise ValueError(f"A unit needs {len(DIMENSIONS)} dimension exponents, got {len(self.dims)}.")
+
+    def __mul__(self, other):
+        if not isinstance(other, Unit):
+            return Unit(self.scale * other, self.dims)
+        return Unit(self.scale * other.scale, (a + b for a, b in zip(self.dims, other.dims)))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if not isinstance(other, Unit):
+            return Unit(self.scale / other, self.dims)
+        return Unit(self.scale / other.scale, (a - b for a, b in zip(self.dims, other.dims)))
+
+    def __rtruediv__(self, other):
+        return Unit(other / self.scale, (-a for a in self.dims))
+
+    def __pow__(self, power):
+        power = Fraction(power)
+        return Unit(self.scale ** float(power), (a * power for a in self.dims))
+
+    def __eq__(self, other):
+        return isinstance(other, Unit) and self.dims == other.dims and self.scale == other.scale
+
+    def __hash__(self):
+        return hash(self.dims)
+
+    def __repr__(self):
+        dims = ', '.join(f'{name}^{d}' for name, d in zip(DIMENSIONS, self.dims) if d != 0)
+        return f'Unit({self.scale:g}, {dims or "dimensionless"})'
+
+    def same_dimension(self, other):
+        return self.dims == other.dims
+
+
+def _base(index):
+    dims = [0] * len(DIMENSIONS)
+    dims[index] = 1
+    return Unit(1.0, dims)
+
+
+KG, M, S, A, K = (_base(i) for i in range(len(DIMENSIONS)))
+ONE = Unit(1.0, (0,) * len(DIMENSIONS))
+J = KG * M ** 2 / S ** 2
+C = A * S
+V = J / C
+
+# Registered unit names; extend with register_unit()
+UNITS = {
+    '1': ONE, 'rad': ONE,
+    # SI
+    'kg': KG, 'g': KG * 1e-3, 'm': M, 'cm': M * 1e-2, 'mm': M * 1e-3, 'um': M * 1e-6,
+    'nm': M * 1e-9, 'angstrom': M * 1e-10, 's': S, 'ms': S * 1e-3, 'us': S * 1e-6,
+    'ns': S * 1e-9, 'ps': S * 1e-12, 'fs': S * 1e-15, 'A': A, 'K': K,
+    'Hz': 1 / S, 'N': KG * M / S ** 2, 'J': J, 'W': J / S, 'Pa': KG / M / S ** 2,
+    'C': C, 'V': V, 'T': V * S / M ** 2, 'eV': J * E_CHARGE, 'meV': J * E_CHARGE * 1e-3,
+    'amu': KG * ATOMIC_MASS,
+    # atomic units
+    'm_e': KG * M_ELECTRON, 'e': C * E_CHARGE, 'hbar': J * S * HBAR, 'bohr': M * BOHR_RADIUS,
+    'hartree': J * HARTREE, 'a0': M * BOHR_RADIUS, 'Eh': J * HARTREE,
+    # Gaussian (cgs)
+    'erg': J * 1e-7, 'dyn': KG * M / S ** 2 * 1e-5,
+    'statC': C * (0.1 / C_LIGHT), 'statV': V * (C_LIGHT * 1e-6), 'gauss': V * S / M ** 2 * 1e-4,
+    # constants that are commonly used as units
+    'c': M / S * C_LIGHT, 'k_B': J / K * K_BOLTZMANN, 'eps0': C / V / M * EPSILON_0,
+}
+
+_TOKEN = re.compile(r'\s*([*/])?\s*([A-Za-z_][A-Za-z_0-9]*|1)\s*(?:(?:\^|\*\*)\s*\(?\s*(-?[0-9]+(?:/[0-9]+)?)\s*\)?)?')
+
+
+def register_unit(name, value):
+    """
+    Register a new unit name, given as a Unit or a unit expression.
+    """
+    UNITS[name] = value if isinstance(value, Unit) else unit(value)
+    unit.cache_clear()
+    conversion_factor.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def unit(expr):
+    """
+    Parse a unit expression such as 'kg*m^2/s^2' or 'hbar/m_e/bohr^2'.
+
+    :param expr: unit expression, products and quotients of registered units with powers
+    :return: Unit
+    """
+    if isinstance(expr, Unit):
+        return expr
+    result, pos = ONE, 0
+    expr = expr.strip()
+    while pos < len(expr):
+        match = _TOKEN.match(expr, pos)
+        if match is None or (pos > 0 and match.group(1) is None):
+            raise ValueError(f"Cannot parse unit expression '{expr}' at position {pos}.")
+        op, name, power = match.groups()
+        if name not in UNITS:
+            raise ValueError(f"Unknown unit '{name}' in '{expr}'.")
+        factor = UNITS[name] ** Fraction(power) if power else UNITS[name]
+        result = result / factor if op == '/' else result * factor
+        pos = match.end()
+    return result
+
+
+@lru_cache(maxsize=None)
+def conversion_factor(src, dst):
+    """
+    Factor f such that values in `src` are f * values in `dst`, checked for dimensions.
+    """
+    src, dst = unit(src), unit(dst)
+    if not src.same_dimension(dst):
+        raise ValueError(f"Cannot convert {src} to {dst}: dimensions differ.")
+    return src.scale / dst.scale
+
+
+def convert(values, src, dst):
+    """
+    Convert an array from unit `src` to unit `dst` with a single multiplication.
+
+    :return: float64 ndarray
+    """
+    return np.multiply(values, conversion_factor(src, dst), dtype=np.float64)
+
+
+class UnitSystem:
+    """
+    A system of units, fixed by its units of the base dimensions.
+
+    Any quantity is expressed in the system by dividing its SI value by
+    prod(base_i ** dims_i); the factor is cached per dimension. Systems whose
+    electromagnetic units do not follow from the base units, like the Gaussian one, list
+    them in `electromagnetic` instead, and other dimensions with current are rejected.
+
+    :param electromagnetic: optional list of the units of the system for the dimensions
+        that involve current, e.g. ['statC', 'statV', 'gauss']
+    """
+
+    def __init__(self, name, mass, length, time, current, temperature, electromagnetic=None):
+        self.name = name
+        self.base = tuple(unit(u).scale for u in (mass, length, time, current, temperature))
+        self.electromagnetic = None if electromagnetic is None else \
+            {unit(u).dims: unit(u).scale for u in electromagnetic}
+        self._factors = {}
+
+    def __repr__(self):
+        return f'UnitSystem({self.name})'
+
+    def scale(self, dims):
+        """
+        SI value of the unit of this system for the dimension `dims`.
+        """
+        if dims not in self._factors:
+            if self.electromagnetic is not None and dims[DIMENSIONS.index('current')] != 0:
+                if dims not in self.electromagnetic:
+                    raise ValueError(f"{Unit(1.0, dims)} has no unit in the {self.name} system.")
+                self._factors[dims] = self.electromagnetic[dims]
+            else:
+                self._factors[dims] = float(np.prod([b ** float(d) for b, d in zip(self.base, dims)]))
+        return self._factors[dims]
+
+    def unit(self, u):
+        """
+        The unit of this system with the same dimension as `u`.
+        """
+        u = unit(u)
+        return Unit(self.scale(u.dims), u.dims)
+
+
+SI = UnitSystem('SI', 'kg', 'm', 's', 'A', 'K')
+# m_e = e = hbar = 4 pi eps0 = 1, energies in hartree, temperatures in hartree / k_B
+ATOMIC = UnitSystem('atomic', 'm_e', 'bohr', 'hbar/hartree', 'e*hartree/hbar', 'hartree/k_B')
+# cgs mechanical units; the EM units are listed as B and E have the same unit, the gauss
+GAUSSIAN = UnitSystem('Gaussian', 'g', 'cm', 's', 'statC/s', 'K',
+                      electromagnetic=['statC', 'statC/s', 'statV', 'statV/cm', 'gauss'])
+
+
+class Quantity:
+    """
+    An ndarray with a unit attached to the array as a whole.
+
+    Arithmetic checks and combines the units once per operation on the whole array;
+    `value` is the bare float64 array to be used in hot loops.
+    """
+    __slots__ = ('value', 'unit')
+
+    # make ndarray and numpy scalar operands defer to the reflected methods below, rather
+    # than wrapping every element in a Quantity of its own
+    __array_ufunc__ = None
+
+    def __init__(self, value, u):
+        self.value = np.asarray(value, dtype=np.float64)
+        self.unit = unit(u)
+
+    def __repr__(self):
+        return f'Quantity({self.value!r}, {self.unit!r})'
+
+    def to(self, u):
+        """
+        The same quantity in the unit `u`.
+        """
+        u = unit(u)
+        return Quantity(self.value * conversion_factor(self.unit, u), u)
+
+    def in_units(self, u):
+        """
+        The bare values in the unit `u`.
+        """
+        return convert(self.value, self.unit, u)
+
+    def in_system(self, system):
+        """
+        The bare values in a UnitSystem, e.g. ATOMIC.
+        """
+        return self.value * (self.unit.scale / system.scale(self.unit.dims))
+
+    def _values_of(self, other):
+        """
+        Bare values of `other` in the unit of self; plain numbers only for dimensionless self.
+        """
+        if isinstance(other, Quantity):
+            return other.in_units(self.unit)
+        if not self.unit.same_dimension(ONE):
+            raise TypeError(f"Cannot add or subtract a plain number and a quantity in {self.unit}.")
+        return np.asarray(other, dtype=np.float64) / self.unit.scale
+
+    def __add__(self, other):
+        return Quantity(self.value + self._values_of(other), self.unit)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Quantity(self.value - self._values_of(other), self.unit)
+
+    def __rsub__(self, other):
+        return Quantity(self._values_of(other) - self.value, self.unit)
+
+    def __neg__(self):
+        return Quantity(-self.value, self.unit)
+
+    def __mul__(self, other):
+        if isinstance(other, Quantity):
+            return Quantity(self.value * other.value, self.unit * other.unit)
+        if isinstance(other, Unit):
+            return Quantity(self.value, self.unit * other)
+        return Quantity(self.value * other, self.unit)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Quantity):
+            return Quantity(self.value / other.value, self.unit / other.unit)
+        if isinstance(other, Unit):
+            return Quantity(self.value, self.unit / other)
+        return Quantity(self.value / other, self.unit)
+
+    def __rtruediv__(self, other):
+        return Quantity(other / self.value, 1 / self.unit)
+
+    def __pow__(self, power):
+        return Quantity(self.value ** power, self.unit ** power)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __getitem__(self, item):
+        return Quantity(self.value[item], self.unit)
+
+
+def test_parse():
+    assert unit('kg*m^2/s^2') == UNITS['J']
+    assert unit('kg * m**2 / s**2') == UNITS['J']
+    assert unit('m^(1/2)') ** 2 == UNITS['m']
+    assert unit('1/s') == UNITS['Hz']
+    for bad in ['kg m', 'furlong', 'm^']:
+        try:
+            unit(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"'{bad}' should not parse")
+
+
+def test_conversion():
+    assert np.isclose(conversion_factor('hartree', 'eV'), 27.211386245988)
+    assert np.isclose(conversion_factor('erg', 'J'), 1e-7)
+    assert np.isclose(conversion_factor('statC', 'e'), 2.0819433e9)
+    try:
+        conversion_factor('eV', 'm')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("eV and m should not be convertible")
+
+    x = np.linspace(0, 1, 1000)
+    y = convert(x, 'angstrom', 'bohr')
+    assert y.dtype == np.float64 and np.allclose(y, x / 0.529177210903)
+
+
+def test_systems():
+    # the atomic units of the base constants are 1
+    for name in ['m_e', 'e', 'hbar', 'bohr', 'hartree']:
+        assert np.isclose(Quantity(1.0, name).in_system(ATOMIC), 1)
+    assert np.isclose(Quantity(1.0, 'eps0').in_system(ATOMIC), 1 / (4 * np.pi))
+    assert np.isclose(Quantity(1.0, 'J').in_system(GAUSSIAN), 1e7)
+    # Coulomb's law is e^2 / r in Gaussian units
+    force = Quantity(1.0, 'e') ** 2 / (4 * np.pi * Quantity(1.0, 'eps0') * Quantity(1.0, 'angstrom') ** 2)
+    cgs = Quantity(1.0, 'e').in_units('statC') ** 2 / Quantity(1.0, 'angstrom').in_units('cm') ** 2
+    assert np.isclose(force.in_system(GAUSSIAN), cgs)
+    # B and E fields share the unit gauss = statV/cm
+    assert np.isclose(Quantity(1.0, 'gauss').in_system(GAUSSIAN), 1)
+    assert np.isclose(Quantity(1.0, 'T').in_system(GAUSSIAN), 1e4)
+    assert np.isclose(Quantity(1.0, 'statV/cm').in_system(GAUSSIAN), 1)
+    assert np.isclose(Quantity(1.0, 'V').in_system(GAUSSIAN), 1 / 299.792458)
+    try:
+        Quantity(1.0, 'eps0').in_system(GAUSSIAN)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("eps0 has no Gaussian unit")
+
+
+def test_quantity():
+    k = Quantity([1.0, 2.0], 'eV/angstrom^2')
+    m = Quantity(1.0, 'amu')
+    omega = (k / m) ** Fraction(1, 2)
+    assert omega.unit.same_dimension(unit('Hz'))
+    assert np.allclose(omega.in_units('Hz'), np.sqrt(k.value * E_CHARGE / 1e-20 / ATOMIC_MASS))
+    total = Quantity(1.0, 'eV') + Quantity(1.0, 'meV')
+    assert np.isclose(total.value, 1.001) and total.unit == UNITS['eV']
+    try:
+        Quantity([1.0, 2.0], 'eV') + 1.0
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("a plain number cannot be added to energies")
+    ratio = 1.0 - Quantity(1.0, 'meV') / Quantity(1.0, 'eV')
+    assert np.isclose(ratio.in_units('1'), 0.999)
+
+    # numpy operands on the left act on the whole array
+    q = Quantity([1.0, 2.0, 3.0], 'eV')
+    for product in [np.array([1.0, 2.0, 3.0]) * q, np.float64(2.0) * q, np.sqrt(2) * q]:
+        assert isinstance(product, Quantity) and product.value.dtype == np.float64
+    assert np.allclose((np.array([1.0, 2.0, 3.0]) * q).value, [1, 4, 9])
+    inverse = np.float64(1.0) / q
+    assert isinstance(inverse, Quantity) and inverse.unit == 1 / UNITS['eV']
+    total = np.array([1.0, 2.0]) - Quantity([1.0, 1.0], 'meV/eV')
+    assert isinstance(total, Quantity) and np.allclose(total.in_units('1'), [0.999, 1.999])
+
+
+if __name__ == '__main__':
+    test_parse()
+    test_conversion()
+    test_systems()
+    test_quantity()